@@ -9,13 +9,79 @@ Este aplicativo demonstra dois conceitos fundamentais de comunicação:
 Autor: Estudo baseado nas explicações do Guto Galego
 """
 
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi import BackgroundTasks, FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-import json
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
 import hmac
-import hashlib
+import logging
+import queue
+import sys
+import time
+
+import msgspec
+import orjson
+from pydantic import BaseModel
+
+# ============================================================================
+# CONSTANTES (calculadas uma única vez, na carga do módulo)
+# ============================================================================
+
+# Separador usado nos logs
+SEP = "=" * 70
+
+# Nomes de headers já em minúsculas (o Starlette guarda os headers assim)
+SIG_HEADER = "x-webhook-signature"
+CONTENT_LENGTH_HEADER = "content-length"
+
+# ============================================================================
+# UTILITÁRIOS: LOGGING ASSÍNCRONO
+# ============================================================================
+
+"""
+print() escreve no stdout de forma síncrona: se o terminal/pipe estiver lento,
+o event loop inteiro fica parado esperando. Com QueueHandler o logger só
+formata a mensagem e a coloca numa fila; a escrita no terminal acontece numa
+thread separada (QueueListener), liberando o event loop.
+
+Os argumentos no estilo %s também evitam montar a string quando o nível do
+log está desligado.
+"""
+
+logger = logging.getLogger("webhook")
+logger.setLevel(logging.INFO)
+logger.propagate = False  # Evita duplicar as mensagens no logger raiz
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Liga o logging assíncrono enquanto o servidor estiver rodando
+    
+    Fila, handler e listener são criados aqui (e não na carga do módulo):
+    com reload/workers o uvicorn importa este arquivo duas vezes em cada
+    processo (__mp_main__ e main), e só o app servido executa o lifespan.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)  # -1 = fila sem limite
+    queue_handler = QueueHandler(log_queue)
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, stream_handler)
+    
+    logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        yield
+    finally:
+        # Remove o handler e esvazia a fila antes de encerrar a thread
+        logger.removeHandler(queue_handler)
+        listener.stop()
+
 
 # ============================================================================
 # INICIALIZAÇÃO DO FASTAPI
@@ -24,9 +90,42 @@ import hashlib
 app = FastAPI(
     title="Webhooks & WebSockets Demo",
     description="Aplicação de estudo sobre comunicação assíncrona",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# ============================================================================
+# UTILITÁRIOS: CACHE DE TIMESTAMPS
+# ============================================================================
+
+# Guarda o último timestamp formatado. Com muitas mensagens por segundo,
+# várias chamadas caem no mesmo milissegundo e reaproveitam a string pronta,
+# evitando criar um datetime e formatá-lo a cada log/resposta.
+_ts_cache = {"t": 0.0, "iso": "", "human": ""}
+
+
+def _atualizar_ts_cache():
+    """Reformata o timestamp em cache se ele tiver mais de 1 ms"""
+    t = time.time()
+    # abs(): se o relógio do sistema for atrasado (NTP, ajuste manual), o
+    # cache é renovado ao invés de ficar congelado no horário antigo
+    if abs(t - _ts_cache["t"]) >= 0.001:
+        dt = datetime.fromtimestamp(t)
+        _ts_cache.update(t=t, iso=dt.isoformat(), human=dt.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def now_iso() -> str:
+    """Timestamp atual em ISO 8601 (resolução de 1 ms)"""
+    _atualizar_ts_cache()
+    return _ts_cache["iso"]
+
+
+def now_human() -> str:
+    """Timestamp atual legível para logs: AAAA-MM-DD HH:MM:SS"""
+    _atualizar_ts_cache()
+    return _ts_cache["human"]
+
+
 # ============================================================================
 # MÓDULO 1: WEBHOOK - API INVERTIDA
 # ============================================================================
@@ -51,9 +150,109 @@ Vantagens:
 # Chave secreta simulada (em produção, vem de variável de ambiente)
 WEBHOOK_SECRET = "minha_chave_secreta_super_segura_123"
 
+# Versão em bytes da chave, calculada uma única vez na carga do módulo
+WEBHOOK_SECRET_BYTES = WEBHOOK_SECRET.encode('utf-8')
+
+# Protótipo HMAC com a chave já processada (ipad/opad). Como a chave é
+# constante, cada requisição só clona este estado com .copy(), sem refazer
+# o setup da chave.
+_HMAC_PROTO = hmac.new(WEBHOOK_SECRET_BYTES, b'', 'sha256')
+
+# Tamanho máximo aceito para o corpo do webhook (1 MiB). Eventos de pagamento
+# são pequenos; qualquer coisa muito maior é rejeitada antes de gastar CPU
+# com HMAC e decodificação de JSON.
+MAX_WEBHOOK_BYTES = 1 << 20
+
+
+def _resposta_corpo_grande() -> JSONResponse:
+    """Resposta 413 (Payload Too Large) para corpos acima do limite"""
+    logger.warning("⚠️ Webhook rejeitado: corpo maior que %s bytes", MAX_WEBHOOK_BYTES)
+    return JSONResponse(
+        status_code=413,
+        content={"status": "error", "message": "Corpo da requisição muito grande"}
+    )
+
+
+class PaymentEvent(msgspec.Struct):
+    """
+    Formato do evento de pagamento enviado pelo provedor
+    
+    O msgspec decodifica o JSON direto para esta estrutura, validando os
+    tipos na mesma passada - sem montar um dict intermediário e sem os
+    .get() com valores padrão. Campos extras no JSON são ignorados.
+    
+    Muitos provedores enviam o ID do pedido como número, por isso
+    pedido_id aceita tanto texto quanto inteiro.
+    """
+    evento: str = "desconhecido"
+    status: str = "pendente"
+    valor: float = 0.0
+    pedido_id: str | int = "N/A"
+
+
+class WebhookResposta(BaseModel):
+    """Resposta de sucesso enviada ao provedor do webhook"""
+    status: str
+    message: str
+    evento_recebido: str
+    timestamp: str
+
+
+class ErroResposta(BaseModel):
+    """Resposta de erro (ex: JSON inválido)"""
+    status: str
+    message: str
+
+
+# Decoder reutilizável (evita recriar o decodificador a cada requisição)
+_PAYMENT_DECODER = msgspec.json.Decoder(PaymentEvent)
+
+
+def processar_evento_pagamento(event: PaymentEvent):
+    """
+    Lógica de negócio do evento de pagamento
+    
+    Executada pelo BackgroundTasks depois que a resposta HTTP já foi
+    enviada ao provedor. Como é uma função síncrona, o FastAPI a roda no
+    threadpool, então operações bloqueantes (banco, email) não travam o
+    event loop.
+    
+    Args:
+        event: Evento de pagamento já decodificado e validado
+    """
+    
+    # Extrai informações relevantes do evento
+    evento = event.evento
+    status = event.status
+    valor = event.valor
+    pedido_id = event.pedido_id
+    
+    logger.info("\n📊 PROCESSANDO EVENTO:")
+    logger.info("   • Tipo: %s", evento)
+    logger.info("   • Status: %s", status)
+    logger.info("   • Valor: R$ %.2f", valor)
+    logger.info("   • Pedido: %s", pedido_id)
+    
+    # Aqui você faria a lógica de negócio, por exemplo:
+    # - Atualizar status do pedido no banco de dados
+    # - Enviar email de confirmação para o cliente
+    # - Liberar acesso a um produto digital
+    # - Disparar notificação push
+    
+    if status == "aprovado":
+        logger.info("✅ Pagamento aprovado - liberando pedido...")
+        # simulate_liberar_pedido(pedido_id)
+    elif status == "recusado":
+        logger.info("❌ Pagamento recusado - notificando cliente...")
+        # simulate_notificar_falha(pedido_id)
+    
+    logger.info("%s\n", SEP)
+
 
 @app.post("/webhook/pagamento")
-async def webhook_pagamento(request: Request):
+async def webhook_pagamento(
+    request: Request, background_tasks: BackgroundTasks
+) -> WebhookResposta | ErroResposta:
     """
     Endpoint que RECEBE notificações de pagamento de provedores externos
     
@@ -61,10 +260,11 @@ async def webhook_pagamento(request: Request):
     1. Provedor de pagamento (ex: Stripe) processa um pagamento
     2. Ele faz um POST para este endpoint com os dados
     3. Verificamos a autenticidade (assinatura)
-    4. Processamos o evento
+    4. Respondemos na hora e processamos o evento em segundo plano
     
     Args:
         request: Objeto da requisição contendo headers e body
+        background_tasks: Fila de tarefas executadas após a resposta
     
     Returns:
         JSON confirmando o recebimento
@@ -73,22 +273,47 @@ async def webhook_pagamento(request: Request):
     # ========================================================================
     # PASSO 1: EXTRAIR OS DADOS DO CORPO DA REQUISIÇÃO
     # ========================================================================
+    
+    # Caminho rápido: se o Content-Length já anuncia um corpo grande demais,
+    # rejeita sem ler nada
     try:
-        # Lê o corpo da requisição como bytes (necessário para validação)
-        body_bytes = await request.body()
+        content_length = int(request.headers.get(CONTENT_LENGTH_HEADER, "0"))
+    except ValueError:
+        content_length = 0  # Header inválido: o limite na leitura abaixo protege
+    if content_length > MAX_WEBHOOK_BYTES:
+        return _resposta_corpo_grande()
+    
+    try:
+        # Lê o corpo da requisição em streaming, alimentando o HMAC a cada
+        # chunk: o corpo é percorrido uma única vez (leitura + hash juntos),
+        # ao invés de bufferizar tudo com request.body() e depois hashear.
+        hmac_obj = _HMAC_PROTO.copy()
+        body_bytes = bytearray()
+        async for chunk in request.stream():
+            hmac_obj.update(chunk)
+            body_bytes += chunk
+            # Sem Content-Length (chunked) ou com valor falso: o limite
+            # também é verificado durante a leitura
+            if len(body_bytes) > MAX_WEBHOOK_BYTES:
+                return _resposta_corpo_grande()
         
-        # Converte para string e depois para dicionário Python
-        payload = json.loads(body_bytes.decode('utf-8'))
+        # Decodifica e valida direto para PaymentEvent (msgspec aceita bytes,
+        # dispensando o decode para string)
+        event = _PAYMENT_DECODER.decode(body_bytes)
         
-        print("\n" + "="*70)
-        print("🎉 WEBHOOK RECEBIDO!")
-        print("="*70)
-        print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📦 Dados recebidos: {json.dumps(payload, indent=2, ensure_ascii=False)}")
+        logger.info("\n%s", SEP)
+        logger.info("🎉 WEBHOOK RECEBIDO!")
+        logger.info(SEP)
+        logger.info("⏰ Timestamp: %s", now_human())
+        # Só formata o corpo recebido se o nível INFO estiver ativo
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📦 Dados recebidos: %s",
+                        msgspec.json.format(body_bytes, indent=2).decode('utf-8'))
         
-    except json.JSONDecodeError:
-        print("❌ Erro ao decodificar JSON do webhook")
-        return {"status": "error", "message": "JSON inválido"}
+    except msgspec.DecodeError as e:
+        # Inclui ValidationError (JSON válido, mas com tipos errados)
+        logger.error("❌ Erro ao decodificar JSON do webhook: %s", e)
+        return ErroResposta(status="error", message="JSON inválido")
     
     # ========================================================================
     # PASSO 2: VALIDAR A ASSINATURA (SECURITY)
@@ -108,58 +333,44 @@ async def webhook_pagamento(request: Request):
     """
     
     # Obtém a assinatura enviada pelo provedor (simulado)
-    signature_header = request.headers.get("X-Webhook-Signature", "")
+    signature_header = request.headers.get(SIG_HEADER, "")
     
-    # Calcula a assinatura esperada usando HMAC-SHA256
+    # Assinatura esperada usando HMAC-SHA256
     # HMAC = Hash-based Message Authentication Code (padrão da indústria)
-    expected_signature = hmac.new(
-        key=WEBHOOK_SECRET.encode('utf-8'),  # Chave secreta compartilhada
-        msg=body_bytes,                       # Corpo original da mensagem
-        digestmod=hashlib.sha256              # Algoritmo de hash
-    ).hexdigest()
+    # O hash já foi calculado durante a leitura do corpo (PASSO 1),
+    # aqui só finalizamos o digest
+    expected_signature = hmac_obj.digest()
+    
+    # Converte o header (hexadecimal) para os 32 bytes brutos do digest.
+    # Comparar em bytes evita gerar a string hex a cada requisição.
+    # bytes.fromhex() ignora espaços, então exigimos exatamente 64 caracteres
+    # antes de decodificar (mantém a comparação exata do header).
+    signature_bytes = b''  # Header não é hex válido -> assinatura inválida
+    if len(signature_header) == 64:
+        try:
+            signature_bytes = bytes.fromhex(signature_header)
+        except ValueError:
+            pass
     
     # Compara as assinaturas de forma segura (evita timing attacks)
-    is_valid = hmac.compare_digest(signature_header, expected_signature)
+    is_valid = hmac.compare_digest(signature_bytes, expected_signature)
     
     if not is_valid:
-        print("⚠️ ALERTA: Assinatura inválida! Possível tentativa de fraude.")
-        print(f"   Esperado: {expected_signature}")
-        print(f"   Recebido: {signature_header}")
+        logger.warning("⚠️ ALERTA: Assinatura inválida! Possível tentativa de fraude.")
+        logger.warning("   Esperado: %s", expected_signature.hex())
+        logger.warning("   Recebido: %s", signature_header)
         # Em produção, você retornaria 401 Unauthorized aqui
         # return {"status": "error", "message": "Assinatura inválida"}, 401
     else:
-        print("✅ Assinatura válida - Webhook autêntico")
+        logger.info("✅ Assinatura válida - Webhook autêntico")
     
     # ========================================================================
-    # PASSO 3: PROCESSAR O EVENTO DE PAGAMENTO
+    # PASSO 3: AGENDAR O PROCESSAMENTO DO EVENTO DE PAGAMENTO
     # ========================================================================
     
-    # Extrai informações relevantes do payload
-    evento = payload.get("evento", "desconhecido")
-    status = payload.get("status", "pendente")
-    valor = payload.get("valor", 0)
-    pedido_id = payload.get("pedido_id", "N/A")
-    
-    print(f"\n📊 PROCESSANDO EVENTO:")
-    print(f"   • Tipo: {evento}")
-    print(f"   • Status: {status}")
-    print(f"   • Valor: R$ {valor:.2f}")
-    print(f"   • Pedido: {pedido_id}")
-    
-    # Aqui você faria a lógica de negócio, por exemplo:
-    # - Atualizar status do pedido no banco de dados
-    # - Enviar email de confirmação para o cliente
-    # - Liberar acesso a um produto digital
-    # - Disparar notificação push
-    
-    if status == "aprovado":
-        print("✅ Pagamento aprovado - liberando pedido...")
-        # simulate_liberar_pedido(pedido_id)
-    elif status == "recusado":
-        print("❌ Pagamento recusado - notificando cliente...")
-        # simulate_notificar_falha(pedido_id)
-    
-    print("="*70 + "\n")
+    # A lógica de negócio roda DEPOIS que a resposta for enviada
+    # (ver processar_evento_pagamento)
+    background_tasks.add_task(processar_evento_pagamento, event)
     
     # ========================================================================
     # PASSO 4: RESPONDER AO PROVEDOR
@@ -172,15 +383,20 @@ async def webhook_pagamento(request: Request):
     - Pode marcar seu endpoint como "down"
     - Pode desabilitar os webhooks
     
-    Dica: Faça processamento pesado de forma assíncrona (ex: Celery, RQ)
+    Por isso respondemos assim que a assinatura é verificada, e o
+    processamento acontece em segundo plano (BackgroundTasks).
+    Para volumes maiores, use uma fila dedicada (ex: Celery, RQ).
     """
     
-    return {
-        "status": "success",
-        "message": "Webhook processado com sucesso",
-        "evento_recebido": evento,
-        "timestamp": datetime.now().isoformat()
-    }
+    # Com o tipo de retorno declarado, o FastAPI serializa a resposta direto
+    # pelo Pydantic (núcleo em Rust), sem passar pelo jsonable_encoder.
+    # As background_tasks continuam sendo executadas após o envio.
+    return WebhookResposta(
+        status="accepted",
+        message="Webhook recebido - processamento em segundo plano",
+        evento_recebido=event.evento,
+        timestamp=now_iso()
+    )
 
 
 # ============================================================================
@@ -212,8 +428,26 @@ Casos de uso ideais:
 ✓ Colaboração em tempo real (ex: Google Docs)
 """
 
-# Lista de conexões ativas (em produção, use Redis ou similar)
-active_connections: list[WebSocket] = []
+# Conjunto de conexões ativas (em produção, use Redis ou similar)
+# set ao invés de list: adicionar/remover é O(1), mesmo com milhares de clientes
+active_connections: set[WebSocket] = set()
+
+
+@dataclass(slots=True)
+class WsResponse:
+    """
+    Resposta enviada para cada mensagem recebida no WebSocket
+    
+    Formato fixo: um dataclass com slots não tem __dict__ por instância e o
+    orjson serializa dataclasses nativamente (mais rápido que um dict).
+    """
+    tipo: str
+    mensagem_original: str
+    mensagem_processada: str
+    timestamp_recebido: str
+    timestamp_enviado: str
+    latencia_ms: float
+    caracteres: int
 
 
 @app.websocket("/ws")
@@ -225,7 +459,7 @@ async def websocket_endpoint(websocket: WebSocket):
     1. Cliente solicita upgrade de HTTP para WebSocket
     2. accept() estabelece a conexão
     3. Loop infinito aguardando mensagens
-    4. Quando cliente desconecta, remove da lista
+    4. Quando cliente desconecta, remove do conjunto de conexões
     
     Args:
         websocket: Objeto de conexão WebSocket
@@ -235,25 +469,26 @@ async def websocket_endpoint(websocket: WebSocket):
     # FASE 1: ESTABELECER CONEXÃO (HANDSHAKE)
     # ========================================================================
     await websocket.accept()
-    active_connections.append(websocket)
+    active_connections.add(websocket)
     
     client_id = id(websocket)  # ID único para esta conexão
     
-    print("\n" + "="*70)
-    print(f"🔌 NOVA CONEXÃO WEBSOCKET")
-    print("="*70)
-    print(f"   • Cliente ID: {client_id}")
-    print(f"   • Conexões ativas: {len(active_connections)}")
-    print(f"   • Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("="*70 + "\n")
+    logger.info("\n%s", SEP)
+    logger.info("🔌 NOVA CONEXÃO WEBSOCKET")
+    logger.info(SEP)
+    logger.info("   • Cliente ID: %s", client_id)
+    logger.info("   • Conexões ativas: %s", len(active_connections))
+    logger.info("   • Timestamp: %s", now_human())
+    logger.info("%s\n", SEP)
     
     # Envia mensagem de boas-vindas
-    await websocket.send_json({
+    # (serializada com orjson: mais rápido que o json.dumps do send_json)
+    await websocket.send_text(orjson.dumps({
         "tipo": "conexao",
         "mensagem": "Conectado ao servidor WebSocket!",
         "client_id": client_id,
-        "timestamp": datetime.now().isoformat()
-    })
+        "timestamp": now_iso()
+    }).decode('utf-8'))
     
     try:
         # ====================================================================
@@ -267,44 +502,60 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Aguarda receber dados do cliente
             # Pode ser: texto, JSON, ou bytes
+            # O navegador envia frames de TEXTO, que o servidor (uvicorn) já
+            # entrega decodificados como str - receive_bytes() falharia aqui,
+            # e não há decode UTF-8 extra para economizar na aplicação.
             data = await websocket.receive_text()
             
-            print(f"📨 Mensagem recebida do cliente {client_id}: {data}")
+            logger.info("📨 Mensagem recebida do cliente %s: %s", client_id, data)
             
             # ==============================================================
             # PROCESSAMENTO DA MENSAGEM
             # ==============================================================
             
             # Adiciona timestamp (demonstra latência baixa)
+            # A latência é medida com perf_counter_ns(): relógio monotônico em
+            # nanossegundos (int), bem mais barato que subtrair datetimes.
+            # Os timestamps da resposta são reais (não o cache de 1 ms dos
+            # logs), para que recebido/enviado reflitam o instante exato.
             timestamp_recebido = datetime.now()
+            t0 = time.perf_counter_ns()
             
             # Transforma a mensagem (exemplo: inverte o texto)
+            # O slice de str já roda em C (não é um loop Python). Inverter os
+            # bytes UTF-8 seria mais "barato", mas quebraria caracteres
+            # multibyte como "á" - por isso invertemos a string mesmo.
             mensagem_invertida = data[::-1]
             
             # Calcula tempo de processamento (microsegundos)
+            latencia_ms = (time.perf_counter_ns() - t0) / 1e6
             timestamp_enviado = datetime.now()
-            latencia_ms = (timestamp_enviado - timestamp_recebido).total_seconds() * 1000
             
             # ==============================================================
             # ENVIO DA RESPOSTA
             # ==============================================================
             
-            resposta = {
-                "tipo": "resposta",
-                "mensagem_original": data,
-                "mensagem_processada": mensagem_invertida,
-                "timestamp_recebido": timestamp_recebido.isoformat(),
-                "timestamp_enviado": timestamp_enviado.isoformat(),
-                "latencia_ms": round(latencia_ms, 2),
-                "caracteres": len(data)
-            }
+            resposta = WsResponse(
+                tipo="resposta",
+                mensagem_original=data,
+                mensagem_processada=mensagem_invertida,
+                timestamp_recebido=timestamp_recebido.isoformat(),
+                timestamp_enviado=timestamp_enviado.isoformat(),
+                latencia_ms=round(latencia_ms, 2),
+                caracteres=len(data)
+            )
+            
+            # Serializa uma única vez com orjson; o mesmo texto pode ser
+            # reaproveitado se a resposta também for enviada em broadcast
+            resposta_json = orjson.dumps(resposta).decode('utf-8')
             
             # Envia resposta para o cliente específico
-            await websocket.send_json(resposta)
+            # (frame de texto: o navegador faz JSON.parse em event.data)
+            await websocket.send_text(resposta_json)
             
-            print(f"📤 Resposta enviada para cliente {client_id}")
-            print(f"   • Latência: {latencia_ms:.2f}ms")
-            print(f"   • Processamento: {mensagem_invertida}\n")
+            logger.info("📤 Resposta enviada para cliente %s", client_id)
+            logger.info("   • Latência: %.2fms", latencia_ms)
+            logger.info("   • Processamento: %s\n", mensagem_invertida)
             
             # ==============================================================
             # BROADCAST (OPCIONAL)
@@ -312,13 +563,21 @@ async def websocket_endpoint(websocket: WebSocket):
             """
             Se quiser enviar para TODOS os clientes conectados:
             
-            for connection in active_connections:
-                if connection != websocket:  # Não envia para si mesmo
-                    await connection.send_json({
-                        "tipo": "broadcast",
-                        "de": client_id,
-                        "mensagem": data
-                    })
+            # Serializa UMA vez e reaproveita o mesmo texto para todos
+            payload = orjson.dumps({
+                "tipo": "broadcast",
+                "de": client_id,
+                "mensagem": data
+            }).decode('utf-8')
+            
+            # Envia em paralelo (asyncio.gather); um cliente com erro
+            # não interrompe o envio para os demais
+            await asyncio.gather(
+                *(connection.send_text(payload)
+                  for connection in active_connections
+                  if connection is not websocket),  # Não envia para si mesmo
+                return_exceptions=True
+            )
             """
     
     except WebSocketDisconnect:
@@ -332,50 +591,63 @@ async def websocket_endpoint(websocket: WebSocket):
         - Chama websocket.close() no JavaScript
         """
         
-        active_connections.remove(websocket)
+        active_connections.discard(websocket)
         
-        print("\n" + "="*70)
-        print(f"🔌 CLIENTE DESCONECTADO")
-        print("="*70)
-        print(f"   • Cliente ID: {client_id}")
-        print(f"   • Conexões restantes: {len(active_connections)}")
-        print(f"   • Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*70 + "\n")
+        logger.info("\n%s", SEP)
+        logger.info("🔌 CLIENTE DESCONECTADO")
+        logger.info(SEP)
+        logger.info("   • Cliente ID: %s", client_id)
+        logger.info("   • Conexões restantes: %s", len(active_connections))
+        logger.info("   • Timestamp: %s", now_human())
+        logger.info("%s\n", SEP)
     
     except Exception as e:
-        print(f"❌ Erro no WebSocket do cliente {client_id}: {e}")
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        logger.error("❌ Erro no WebSocket do cliente %s: %s", client_id, e)
+        active_connections.discard(websocket)
 
 
 # ============================================================================
 # INTERFACE HTML DE TESTE
 # ============================================================================
 
+# A página é lida UMA vez, na carga do módulo, e a mesma resposta (com o
+# Content-Length já calculado) é reaproveitada a cada GET - sem acessar o
+# disco por requisição. Como o --reload só observa arquivos .py, reinicie o
+# servidor depois de editar o index.html.
+_INDEX_BYTES = Path(__file__).with_name("index.html").read_bytes()
+_INDEX_RESPONSE = HTMLResponse(content=_INDEX_BYTES)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def get_interface():
     """
     Serve a página HTML de teste com JavaScript integrado
     """
-    with open("index.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return _INDEX_RESPONSE
 
 
 # ============================================================================
 # ENDPOINT DE HEALTHCHECK
 # ============================================================================
 
+class HealthResposta(BaseModel):
+    """Estado do servidor retornado pelo healthcheck"""
+    status: str
+    websocket_connections: int
+    timestamp: str
+
+
 @app.get("/health")
-async def health_check():
+async def health_check() -> HealthResposta:
     """
     Endpoint para verificar se o servidor está rodando
     Útil para monitoramento e load balancers
     """
-    return {
-        "status": "online",
-        "websocket_connections": len(active_connections),
-        "timestamp": datetime.now().isoformat()
-    }
+    return HealthResposta(
+        status="online",
+        websocket_connections=len(active_connections),
+        timestamp=now_iso()
+    )
 
 
 # ============================================================================
@@ -387,7 +659,7 @@ if __name__ == "__main__":
     Para rodar este servidor:
     
     1. Instale as dependências:
-       pip install fastapi uvicorn
+       pip install fastapi "uvicorn[standard]" orjson msgspec
     
     2. Execute o servidor:
        python main.py
@@ -404,14 +676,36 @@ if __name__ == "__main__":
     - --host: IP de escuta (0.0.0.0 = todas as interfaces)
     - --port: Porta do servidor
     - --workers: Número de processos workers (produção)
+    
+    Produção (AMBIENTE=producao python main.py):
+    - Desliga o --reload e sobe um worker por núcleo de CPU; validar HMAC e
+      decodificar JSON é trabalho de CPU, então escala quase linearmente
+    - Alternativa com gunicorn, com SO_REUSEPORT (o kernel distribui os
+      accept() entre os processos):
+        gunicorn -k uvicorn.workers.UvicornWorker -w $(nproc) --reuse-port main:app
+    - Cada worker tem seu próprio active_connections: para broadcast entre
+      workers, use um canal pub/sub compartilhado (ex: Redis)
+    
+    O extra [standard] do uvicorn instala uvloop (event loop em C, sobre a
+    libuv), httptools (parser HTTP em C) e websockets. Com loop/http em
+    "auto", o uvicorn usa essas versões rápidas quando estão disponíveis
+    (o uvloop não existe no Windows, onde cai no asyncio padrão).
     """
     
+    import os
     import uvicorn
     
+    producao = os.getenv("AMBIENTE") == "producao"
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,  # Auto-reload em desenvolvimento
+        reload=not producao,  # Auto-reload só em desenvolvimento
+        # Um processo por núcleo em produção (reload e workers não combinam)
+        workers=(os.cpu_count() or 1) if producao else None,
+        loop="auto",  # uvloop se instalado, senão asyncio
+        http="auto",  # httptools se instalado, senão h11
+        ws="auto",    # websockets se instalado, senão wsproto
         log_level="info"
     )
\ No newline at end of file